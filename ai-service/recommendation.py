@@ -13,8 +13,6 @@ from dotenv import load_dotenv
 import time
 from functools import lru_cache
 import logging
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import hashlib
 import json
 import re
@@ -23,6 +21,7 @@ import random
 from textblob import TextBlob
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
+from tmdb_client import TMDBClient
 
 # Download NLTK data
 try:
@@ -69,43 +68,29 @@ def cached(timeout=300):
                 if time.time() - cached_data['timestamp'] < timeout:
                     return cached_data['data']
             
-            # Call function and cache result
+            # Call function and cache result (failures return None and are not cached)
             result = func(*args, **kwargs)
-            cache[key] = {
-                'data': result,
-                'timestamp': time.time()
-            }
+            if result is not None:
+                cache[key] = {
+                    'data': result,
+                    'timestamp': time.time()
+                }
             return result
         return wrapper
     return decorator
 
-# Configure retry strategy for requests
-def create_session():
-    session = requests.Session()
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    return session
+# Shared TMDB client: coalesces concurrent calls, paces them through one rate budget
+# and serves stale responses while TMDB is degraded
+tmdb = TMDBClient.from_env()
 
 def fetch_movies(pages=10):
     """Fetch movies from TMDB with retry logic and error handling."""
     movies = []
-    session = create_session()
     
     for page in range(1, pages + 1):
         try:
-            url = "https://api.themoviedb.org/3/movie/popular"
-            headers = {"Authorization": f"Bearer {TMDB_API_KEY}"}
             params = {"language": "en-US", "page": page}
-
-            response = session.get(url, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = tmdb.get("/movie/popular", params=params)
 
             for m in data.get("results", []):
                 movies.append({
@@ -120,9 +105,6 @@ def fetch_movies(pages=10):
                     "original_language": m.get("original_language", ""),
                     "vote_count": m.get("vote_count", 0)
                 })
-
-            # Respect rate limits - add delay between requests
-            time.sleep(0.2)
             
         except requests.exceptions.RequestException as e:
             logger.warning(f"Failed to fetch page {page}: {e}")
@@ -161,15 +143,8 @@ def get_similarity_matrix():
 def get_movie_details(movie_id):
     """Get detailed movie information from TMDB with caching."""
     try:
-        url = f"https://api.themoviedb.org/3/movie/{movie_id}"
-        headers = {"Authorization": f"Bearer {TMDB_API_KEY}"}
         params = {"language": "en-US", "append_to_response": "keywords,credits"}
-        
-        session = create_session()
-        response = session.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        
-        tmdb_data = response.json()
+        tmdb_data = tmdb.get(f"/movie/{int(movie_id)}", params=params)
         
         return {
             "id": tmdb_data["id"],
@@ -323,6 +298,8 @@ def health_check():
         "status": "healthy", 
         "movie_count": len(get_movie_data()),
         "cache_size": len(cache),
+        "tmdb_circuit": tmdb.breaker.state,
+        "tmdb_stats": tmdb.get_stats(),
         "users_registered": len(user_profiles)
     })
 
@@ -623,6 +600,7 @@ def clear_cache():
     """Clear the cache (for development purposes)."""
     global cache
     cache.clear()
+    tmdb.clear()
     get_movie_data.cache_clear()
     get_similarity_matrix.cache_clear()
     return jsonify({"message": "Cache cleared successfully"})
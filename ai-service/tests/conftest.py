@@ -0,0 +1,70 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+
+class FakeTMDB:
+    """Local stand-in for TMDB that replays scripted responses per path."""
+
+    def __init__(self):
+        self.scripts = {}
+        self.fallback = {}
+        self.delay = 0.0
+        self.hits = []
+        self._lock = threading.Lock()
+
+    def script(self, path, *responses):
+        """Queue (status, headers) responses for a path, served before the fallback."""
+        with self._lock:
+            self.scripts.setdefault(path, []).extend(responses)
+
+    def fail_with(self, path, status):
+        with self._lock:
+            self.fallback[path] = status
+
+    def hits_for(self, path):
+        with self._lock:
+            return [t for p, t in self.hits if p == path]
+
+    def next_response(self, path):
+        with self._lock:
+            self.hits.append((path, time.monotonic()))
+            queue = self.scripts.get(path)
+            if queue:
+                return queue.pop(0)
+            return self.fallback.get(path, 200), {}
+
+
+@pytest.fixture
+def fake_tmdb():
+    fake = FakeTMDB()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            status, headers = fake.next_response(path)
+            time.sleep(fake.delay)
+            movie_id = path.rsplit("/", 1)[-1]
+            body = json.dumps({"id": movie_id, "title": f"Movie {movie_id}", "path": path}).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.base_url = f"http://127.0.0.1:{server.server_port}"
+    yield fake
+    server.shutdown()
+    server.server_close()
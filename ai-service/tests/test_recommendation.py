@@ -0,0 +1,37 @@
+import importlib
+import time
+
+import pytest
+
+from tmdb_client import CircuitBreaker, TMDBClient
+
+
+@pytest.fixture
+def recommendation(monkeypatch, fake_tmdb):
+    monkeypatch.setenv("TMDB_API_KEY", "test-key")
+    monkeypatch.setenv("TMDB_BASE_URL", fake_tmdb.base_url)
+    try:
+        module = importlib.import_module("recommendation")
+    except LookupError:
+        pytest.skip("NLTK vader_lexicon is not installed")
+    monkeypatch.setattr(module, "cache", {})
+    return module
+
+
+def test_movie_details_recover_once_breaker_closes(recommendation, fake_tmdb, monkeypatch):
+    client = TMDBClient("test-key", base_url=fake_tmdb.base_url, max_retries=0,
+                        failure_threshold=1, reset_timeout=0.2)
+    monkeypatch.setattr(recommendation, "tmdb", client)
+    fake_tmdb.fail_with("/movie/7", 503)
+
+    assert recommendation.get_movie_details(7) is None
+    assert client.breaker.state == CircuitBreaker.OPEN
+    # Short-circuited while open; the failure must not be cached for the next hour.
+    assert recommendation.get_movie_details(7) is None
+
+    fake_tmdb.fail_with("/movie/7", 200)
+    time.sleep(0.25)
+
+    details = recommendation.get_movie_details(7)
+    assert details["title"] == "Movie 7"
+    assert client.breaker.state == CircuitBreaker.CLOSED
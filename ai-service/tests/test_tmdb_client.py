@@ -0,0 +1,204 @@
+import threading
+import time
+
+import pytest
+
+from tmdb_client import (
+    MAX_RETRY_AFTER,
+    BudgetExhaustedError,
+    CircuitBreaker,
+    CircuitOpenError,
+    RateBudget,
+    TMDBClient,
+    parse_retry_after,
+)
+
+
+def make_client(fake, **kwargs):
+    kwargs.setdefault("max_retries", 0)
+    return TMDBClient("test-key", base_url=fake.base_url, **kwargs)
+
+
+def run_concurrently(count, target):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_gets_for_same_key_are_coalesced(fake_tmdb):
+    fake_tmdb.delay = 0.3
+    client = make_client(fake_tmdb)
+
+    results, errors = run_concurrently(10, lambda: client.get("/movie/1", {"language": "en-US"}))
+
+    assert errors == []
+    assert len(results) == 10
+    assert all(r == {"id": "1", "title": "Movie 1", "path": "/movie/1"} for r in results)
+    assert len(fake_tmdb.hits_for("/movie/1")) == 1
+    stats = client.get_stats()
+    assert stats["requests"] == 1
+    assert stats["coalesced"] == 9
+
+
+def test_retry_after_pauses_every_caller(fake_tmdb):
+    fake_tmdb.script("/movie/1", (429, {"Retry-After": "1"}))
+    client = make_client(fake_tmdb, max_retries=2)
+
+    leader = threading.Thread(target=client.get, args=("/movie/1",))
+    leader.start()
+    while not fake_tmdb.hits_for("/movie/1"):
+        time.sleep(0.01)
+    limited_at = fake_tmdb.hits_for("/movie/1")[0]
+    other = client.get("/movie/2")
+    leader.join()
+
+    assert other["path"] == "/movie/2"
+    retried_at = fake_tmdb.hits_for("/movie/1")[1]
+    assert retried_at - limited_at >= 0.9
+    assert fake_tmdb.hits_for("/movie/2")[0] - limited_at >= 0.9
+    assert client.get_stats()["rate_limited"] == 1
+
+
+def test_waiters_are_paced_after_retry_after_pause():
+    budget = RateBudget(rate=20, burst=20)
+    while budget.acquire(max_wait=0):
+        pass
+
+    start = time.monotonic()
+    budget.block_for(0.5)
+    results, errors = run_concurrently(10, lambda: budget.acquire(max_wait=5) and time.monotonic() - start)
+
+    assert errors == []
+    times = sorted(results)
+    assert times[0] >= 0.5
+    # Tokens don't pile up during the pause, so waiters leave 1/rate apart rather than at once.
+    assert times[-1] - times[0] >= 9 / 20 * 0.8
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert min(gaps) >= 1 / 20 * 0.5
+
+
+def test_serves_stale_copy_on_503(fake_tmdb):
+    client = make_client(fake_tmdb)
+    fresh = client.get("/movie/1")
+
+    fake_tmdb.fail_with("/movie/1", 503)
+
+    assert client.get("/movie/1") == fresh
+    assert client.get_stats()["stale_served"] == 1
+
+
+def test_serves_stale_copy_on_timeout(fake_tmdb):
+    client = make_client(fake_tmdb, timeout=0.2)
+    fresh = client.get("/movie/1")
+
+    fake_tmdb.delay = 0.5
+
+    assert client.get("/movie/1") == fresh
+    assert client.get_stats()["stale_served"] == 1
+
+
+def test_breaker_opens_half_opens_and_closes(fake_tmdb):
+    client = make_client(fake_tmdb, failure_threshold=2, reset_timeout=0.3)
+    fake_tmdb.fail_with("/movie/1", 503)
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            client.get("/movie/1")
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    hits = len(fake_tmdb.hits)
+    with pytest.raises(CircuitOpenError):
+        client.get("/movie/1")
+    assert len(fake_tmdb.hits) == hits
+
+    # A failed half-open trial reopens the breaker straight away.
+    time.sleep(0.35)
+    with pytest.raises(Exception):
+        client.get("/movie/1")
+    assert len(fake_tmdb.hits) == hits + 1
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.35)
+    allowed, trial = client.breaker.allow_request()
+    assert allowed and trial is not None
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.allow_request() == (False, None)
+    client.breaker.release_trial(trial)
+
+    fake_tmdb.fail_with("/movie/1", 200)
+    assert client.get("/movie/1")["path"] == "/movie/1"
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stale_call_cannot_release_another_calls_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    _, closed_trial = breaker.allow_request()
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    allowed, trial = breaker.allow_request()
+    assert allowed and trial is not None
+
+    # The call admitted while closed gives up late; it must not free the live trial slot.
+    breaker.release_trial(closed_trial)
+    assert breaker.allow_request() == (False, None)
+
+    breaker.release_trial(trial)
+    assert breaker.allow_request()[0]
+
+
+def test_budget_exhaustion_does_not_open_breaker(fake_tmdb):
+    client = make_client(fake_tmdb, rate=2, burst=1, max_wait=0.2, failure_threshold=2)
+
+    results, errors = run_concurrently(10, lambda: client.get(f"/movie/{threading.get_ident()}"))
+
+    assert errors and all(isinstance(e, BudgetExhaustedError) for e in errors)
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_not_found_is_not_a_breaker_failure(fake_tmdb):
+    client = make_client(fake_tmdb, failure_threshold=1)
+    fake_tmdb.fail_with("/movie/404", 404)
+
+    with pytest.raises(Exception) as excinfo:
+        client.get("/movie/404")
+
+    assert excinfo.value.response.status_code == 404
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_rate_must_be_positive(rate):
+    with pytest.raises(ValueError):
+        RateBudget(rate=rate)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2", 2.0),
+    ("-5", 0.0),
+    ("inf", MAX_RETRY_AFTER),
+    ("1e12", MAX_RETRY_AFTER),
+    ("Fri, 31 Dec 9999 23:59:59 GMT", MAX_RETRY_AFTER),
+    ("nan", None),
+    ("soon", None),
+])
+def test_retry_after_is_capped(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_rate_limit_reset_is_capped():
+    budget = RateBudget()
+    budget.update_from_headers({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "inf"})
+
+    assert budget._blocked_until - time.monotonic() <= MAX_RETRY_AFTER
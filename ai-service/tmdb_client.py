@@ -0,0 +1,343 @@
+import os
+import time
+import json
+import math
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.themoviedb.org/3"
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+# Longest pause a server-supplied Retry-After / X-RateLimit-Reset may impose
+MAX_RETRY_AFTER = 60.0
+
+
+class TMDBUnavailableError(requests.exceptions.RequestException):
+    """Raised when TMDB cannot serve a request and no stale copy is available."""
+
+
+class CircuitOpenError(TMDBUnavailableError):
+    """Raised when the circuit breaker is open and calls are short-circuited."""
+
+
+class BudgetExhaustedError(TMDBUnavailableError):
+    """Raised when the local request budget cannot admit a call within max_wait."""
+
+
+def clamp_delay(seconds):
+    """Bound a server-supplied delay to [0, MAX_RETRY_AFTER]; NaN yields None."""
+    if math.isnan(seconds):
+        return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into a capped delay in seconds."""
+    if not value:
+        return None
+    try:
+        return clamp_delay(float(value))
+    except ValueError:
+        pass
+    try:
+        return clamp_delay(parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class RateBudget:
+    """Global token bucket shared by every TMDB call, paused by Retry-After hints."""
+
+    def __init__(self, rate=20.0, burst=20):
+        if rate <= 0:
+            raise ValueError(f"TMDB rate limit must be greater than 0, got {rate}")
+        if burst < 1:
+            raise ValueError(f"TMDB rate burst must be at least 1, got {burst}")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait=10.0):
+        """Block until a request may be sent. Returns False if that would exceed max_wait."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    # Nothing accrues during a pause, so callers are paced out from an
+                    # empty bucket once it ends instead of leaving as one burst.
+                    refill_from = max(self._updated, self._blocked_until)
+                    self._tokens = min(self.burst, self._tokens + (now - refill_from) * self.rate)
+                    self._updated = now
+
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+
+                    wait = (1 - self._tokens) / self.rate
+
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def block_for(self, seconds):
+        """Hold back every caller for the given number of seconds."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def update_from_headers(self, headers):
+        """Follow TMDB's Retry-After / X-RateLimit-* response headers."""
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is not None:
+            self.block_for(retry_after)
+            return
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            if int(remaining) > 0:
+                return
+            delay = clamp_delay(float(reset) - time.time())
+        except ValueError:
+            return
+        if delay is not None:
+            self.block_for(delay)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after a cooldown."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_id = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return (allowed, trial): trial identifies the half-open slot the caller now owns, if any."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True, None
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_id += 1
+                return True, self._trial_id
+            return False, None
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self, trial):
+        """Give back a half-open trial slot for a call that never reached TMDB."""
+        with self._lock:
+            if trial is not None and trial == self._trial_id:
+                self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"TMDB circuit breaker opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class _InFlight:
+    """A pending TMDB call that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class TMDBClient:
+    """Shared TMDB client with request coalescing, a global rate budget and a circuit breaker."""
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, rate=20.0, burst=20,
+                 max_retries=2, max_wait=10.0, timeout=10,
+                 failure_threshold=5, reset_timeout=30.0, stale_max_entries=5000):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.stale_max_entries = stale_max_entries
+        self.budget = RateBudget(rate=rate, burst=burst)
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self.session = self._create_session()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stale = {}
+        self._stale_lock = threading.Lock()
+        self._stats = {"requests": 0, "coalesced": 0, "rate_limited": 0, "stale_served": 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            api_key=os.getenv("TMDB_API_KEY"),
+            base_url=os.getenv("TMDB_BASE_URL", DEFAULT_BASE_URL),
+            rate=float(os.getenv("TMDB_RATE_LIMIT", "20")),
+            burst=int(os.getenv("TMDB_RATE_BURST", "20")),
+        )
+
+    def _create_session(self):
+        # Retries (429 and 5xx alike) are driven by _fetch so that every attempt takes a
+        # token from the shared budget instead of each connection backing off on its own.
+        session = requests.Session()
+        retry_strategy = Retry(total=0, respect_retry_after_header=False, raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=20)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        return session
+
+    @staticmethod
+    def _key(path, params):
+        return json.dumps([path, params or {}], sort_keys=True)
+
+    def get(self, path, params=None, allow_stale=True):
+        """GET a TMDB path, sharing the response with concurrent callers for the same key.
+
+        When TMDB is rate limiting, failing or the circuit is open, the last good
+        response for the key is returned if allow_stale is set.
+        """
+        key = self._key(path, params)
+
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = _InFlight()
+                self._inflight[key] = pending
+
+        if leader:
+            try:
+                pending.result = self._fetch(path, params)
+                self._remember(key, pending.result)
+            except Exception as e:
+                pending.error = e
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+                pending.event.set()
+        else:
+            self._count("coalesced")
+            pending.event.wait()
+
+        if pending.error is None:
+            return pending.result
+
+        if allow_stale and isinstance(pending.error, TMDBUnavailableError):
+            with self._stale_lock:
+                stale = self._stale.get(key)
+            if stale is not None:
+                self._count("stale_served")
+                logger.warning(f"Serving stale TMDB data for {path}: {pending.error}")
+                return stale
+        raise pending.error
+
+    def _remember(self, key, data):
+        with self._stale_lock:
+            if key not in self._stale and len(self._stale) >= self.stale_max_entries:
+                self._stale.pop(next(iter(self._stale)))
+            self._stale[key] = data
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get_stats(self):
+        """Return a snapshot of the client counters."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _fetch(self, path, params):
+        allowed, trial = self.breaker.allow_request()
+        if not allowed:
+            raise CircuitOpenError(f"TMDB circuit open, skipping {path}")
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        try:
+            for attempt in range(self.max_retries + 1):
+                if not self.budget.acquire(self.max_wait):
+                    raise BudgetExhaustedError(f"TMDB request budget exhausted for {path}")
+
+                self._count("requests")
+                try:
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    if attempt == self.max_retries:
+                        raise TMDBUnavailableError(f"TMDB request for {path} failed: {e}") from e
+                    time.sleep(0.5 * (2 ** attempt))
+                    continue
+
+                self.budget.update_from_headers(response.headers)
+
+                if response.status_code == 429:
+                    self._count("rate_limited")
+                    if "Retry-After" not in response.headers:
+                        self.budget.block_for(0.5 * (2 ** attempt))
+                elif response.status_code in RETRY_STATUS_CODES:
+                    if attempt < self.max_retries:
+                        time.sleep(0.5 * (2 ** attempt))
+                else:
+                    break
+            else:
+                if response.status_code == 429:
+                    raise TMDBUnavailableError(f"TMDB kept rate limiting {path}")
+                raise TMDBUnavailableError(f"TMDB returned {response.status_code} for {path}")
+
+            if response.status_code >= 500:
+                raise TMDBUnavailableError(f"TMDB returned {response.status_code} for {path}")
+        except BudgetExhaustedError:
+            # Local congestion says nothing about TMDB's health, so it is not a breaker failure.
+            self.breaker.release_trial(trial)
+            raise
+        except TMDBUnavailableError:
+            self.breaker.record_failure()
+            raise
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            raise TMDBUnavailableError(f"TMDB request for {path} failed: {e}") from e
+
+        # A 4xx (e.g. unknown movie id) means TMDB is healthy, so it is not a breaker failure.
+        self.breaker.record_success()
+        response.raise_for_status()
+        return response.json()
+
+    def clear(self):
+        """Drop stale copies (for development purposes)."""
+        with self._stale_lock:
+            self._stale.clear()